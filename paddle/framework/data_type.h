@@ -15,6 +15,7 @@ limitations under the License. */
 #pragma once
 #include <typeindex>
 #include "paddle/framework/framework.pb.h"
+#include "paddle/math/float16.h"
 #include "paddle/platform/enforce.h"
 
 namespace paddle {
@@ -22,7 +23,9 @@ namespace framework {
 
 inline proto::DataType ToDataType(std::type_index type) {
   using namespace paddle::framework::proto;
-  if (typeid(float).hash_code() == type.hash_code()) {
+  if (typeid(float16).hash_code() == type.hash_code()) {
+    return DataType::FP16;
+  } else if (typeid(float).hash_code() == type.hash_code()) {
     return DataType::FP32;
   } else if (typeid(double).hash_code() == type.hash_code()) {
     return DataType::FP64;
@@ -40,6 +43,8 @@ inline proto::DataType ToDataType(std::type_index type) {
 inline std::type_index ToTypeIndex(proto::DataType type) {
   using namespace paddle::framework::proto;
   switch (type) {
+    case DataType::FP16:
+      return typeid(float16);
     case DataType::FP32:
       return typeid(float);
     case DataType::FP64:
@@ -59,6 +64,9 @@ template <typename Visitor>
 inline void VisitDataType(proto::DataType type, Visitor visitor) {
   using namespace paddle::framework::proto;
   switch (type) {
+    case DataType::FP16:
+      visitor.template operator()<float16>();
+      break;
     case DataType::FP32:
       visitor.template operator()<float>();
       break;
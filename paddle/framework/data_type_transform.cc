@@ -65,6 +65,9 @@ void TransDataType(const OpKernelType& kernel_type_for_var,
   auto ctx = pool.Get(in.place());
 
   switch (src_type) {
+    case proto::DataType::FP16:
+      framework::VisitDataType(dst_type, CastDataType<float16>(in, out, ctx));
+      break;
     case proto::DataType::FP32:
       framework::VisitDataType(dst_type, CastDataType<float>(in, out, ctx));
       break;
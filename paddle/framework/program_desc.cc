@@ -13,6 +13,11 @@ See the License for the specific language governing permissions and
 limitations under the License. */
 
 #include "paddle/framework/program_desc.h"
+
+#include <climits>
+
+#include <google/protobuf/io/coded_stream.h>
+
 #include "paddle/framework/block_desc.h"
 
 namespace paddle {
@@ -64,5 +69,21 @@ ProgramDesc::ProgramDesc(const std::string &binary_str) {
   }
 }
 
+ProgramDesc::ProgramDesc(const char *buf, size_t length) {
+  // Parse straight from the caller's buffer (e.g. an mmap of the model
+  // file) without an intermediate std::string copy. The default 64MB
+  // message limit is lifted, since serialized programs of large models
+  // can exceed it.
+  google::protobuf::io::CodedInputStream input(
+      reinterpret_cast<const uint8_t *>(buf), static_cast<int>(length));
+  input.SetTotalBytesLimit(INT_MAX, INT_MAX);
+  PADDLE_ENFORCE(
+      desc_.ParseFromCodedStream(&input) && input.ConsumedEntireMessage(),
+      "Fail to parse program_desc from buffer.");
+  for (auto &block_desc : *desc_.mutable_blocks()) {
+    blocks_.emplace_back(new BlockDesc(this, &block_desc));
+  }
+}
+
 }  // namespace framework
 }  // namespace paddle
@@ -35,6 +35,8 @@ class ProgramDesc {
 
   explicit ProgramDesc(const std::string &binary_str);
 
+  ProgramDesc(const char *buf, size_t length);
+
   BlockDesc *AppendBlock(const BlockDesc &parent);
 
   BlockDesc *MutableBlock(size_t idx) { return blocks_[idx].get(); }
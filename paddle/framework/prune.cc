@@ -15,6 +15,7 @@ limitations under the License. */
 #include "paddle/framework/prune.h"
 
 #include <algorithm>
+#include <map>
 #include <set>
 #include <string>
 #include <vector>
@@ -28,6 +29,7 @@ const std::string kFeedOpType = "feed";
 const std::string kFetchOpType = "fetch";
 const std::string kDropOutOpType = "dropout";
 const std::string kBatchNormOpType = "batch_norm";
+const std::string kPrintOpType = "print";
 
 bool HasDependentVar(const proto::OpDesc& op_desc,
                      const std::set<std::string>& dependent_vars) {
@@ -131,5 +133,56 @@ void InferenceOptimize(const proto::ProgramDesc& input,
   inference_optimize_impl(input, output, 0);
 }
 
+void optimize_for_inference_impl(const proto::ProgramDesc& input,
+                                 proto::ProgramDesc* output, int block_id) {
+  // Start from the is_test rewrite of InferenceOptimize.
+  inference_optimize_impl(input, output, block_id);
+
+  auto* op_field = output->mutable_blocks(block_id)->mutable_ops();
+
+  // Strip debug ops. A print op passes its input through unchanged, so
+  // readers of its removed output are rewired to read the input instead.
+  // Ops with an unexpected signature are kept untouched, as are print ops
+  // that produce a target variable: fetch ops are appended for the target
+  // names after this pass runs, so removing the producer would leave the
+  // fetch reading a variable nothing writes.
+  std::map<std::string, std::string> replacements;
+  google::protobuf::RepeatedPtrField<proto::OpDesc> kept_ops;
+  for (auto& op_desc : *op_field) {
+    if (op_desc.type() == kPrintOpType && !IsTarget(op_desc) &&
+        op_desc.inputs_size() == 1 &&
+        op_desc.inputs(0).arguments_size() == 1 &&
+        op_desc.outputs_size() == 1 &&
+        op_desc.outputs(0).arguments_size() == 1) {
+      replacements[op_desc.outputs(0).arguments(0)] =
+          op_desc.inputs(0).arguments(0);
+      continue;
+    }
+    *kept_ops.Add() = op_desc;
+  }
+  op_field->Swap(&kept_ops);
+
+  for (auto& op_desc : *op_field) {
+    for (auto& var : *op_desc.mutable_inputs()) {
+      for (auto& arg : *var.mutable_arguments()) {
+        // Follow chains of removed pass-through ops. The visited set
+        // guards against an op whose output equals its input, which
+        // would otherwise make the chain never terminate.
+        std::set<std::string> visited;
+        auto it = replacements.find(arg);
+        while (it != replacements.end() && visited.insert(arg).second) {
+          arg = it->second;
+          it = replacements.find(arg);
+        }
+      }
+    }
+  }
+}
+
+void OptimizeForInference(const proto::ProgramDesc& input,
+                          proto::ProgramDesc* output) {
+  optimize_for_inference_impl(input, output, 0);
+}
+
 }  // namespace framework
 }  // namespace paddle
@@ -25,5 +25,8 @@ void Prune(const proto::ProgramDesc& input, proto::ProgramDesc* output);
 void InferenceOptimize(const proto::ProgramDesc& input,
                        proto::ProgramDesc* output);
 
+void OptimizeForInference(const proto::ProgramDesc& input,
+                          proto::ProgramDesc* output);
+
 }  // namespace framework
 }  // namespace paddle
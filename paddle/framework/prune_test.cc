@@ -150,3 +150,66 @@ TEST(Prune, multi_target) {
   f::Prune(*pdesc, &pruned);
   PADDLE_ENFORCE_EQ(pruned.blocks(0).ops_size(), 3);
 }
+
+TEST(OptimizeForInference, remove_print_ops) {
+  f::ProgramDesc program;
+  f::BlockDesc *block = program.MutableBlock(0);
+
+  AddOp("one_one", {{"input", {"a"}}}, {{"output", {"b"}}}, f::AttributeMap{},
+        block);
+  AddOp("print", {{"In", {"b"}}}, {{"Out", {"b_printed"}}}, f::AttributeMap{},
+        block);
+  AddOp("one_one", {{"input", {"b_printed"}}}, {{"output", {"c"}}},
+        f::AttributeMap{}, block);
+
+  f::proto::ProgramDesc *pdesc = program.Proto();
+  f::proto::ProgramDesc optimized;
+  f::OptimizeForInference(*pdesc, &optimized);
+
+  // The print op is removed and its reader is rewired to the print input.
+  PADDLE_ENFORCE_EQ(optimized.blocks(0).ops_size(), 2);
+  PADDLE_ENFORCE_EQ(optimized.blocks(0).ops(1).inputs(0).arguments(0), "b");
+}
+
+TEST(OptimizeForInference, keep_targeted_print_ops) {
+  f::ProgramDesc program;
+  f::BlockDesc *block = program.MutableBlock(0);
+
+  AddOp("one_one", {{"input", {"a"}}}, {{"output", {"b"}}}, f::AttributeMap{},
+        block);
+  AddOp("print", {{"In", {"b"}}}, {{"Out", {"b_printed"}}}, f::AttributeMap{},
+        block);
+
+  f::proto::ProgramDesc *pdesc = program.Proto();
+  // Fetch ops for the target names are appended after the pass runs, so a
+  // print op that produces a target must survive the pass.
+  pdesc->mutable_blocks(0)->mutable_ops(1)->set_is_target(true);
+
+  f::proto::ProgramDesc optimized;
+  f::OptimizeForInference(*pdesc, &optimized);
+
+  PADDLE_ENFORCE_EQ(optimized.blocks(0).ops_size(), 2);
+  PADDLE_ENFORCE_EQ(optimized.blocks(0).ops(1).type(), "print");
+  PADDLE_ENFORCE_EQ(optimized.blocks(0).ops(1).outputs(0).arguments(0),
+                    "b_printed");
+}
+
+TEST(OptimizeForInference, self_referential_print_op) {
+  f::ProgramDesc program;
+  f::BlockDesc *block = program.MutableBlock(0);
+
+  AddOp("one_one", {{"input", {"a"}}}, {{"output", {"b"}}}, f::AttributeMap{},
+        block);
+  // A print op wired to write its own input produces a self-referential
+  // replacement; rewiring must still terminate.
+  AddOp("print", {{"In", {"b"}}}, {{"Out", {"b"}}}, f::AttributeMap{}, block);
+  AddOp("one_one", {{"input", {"b"}}}, {{"output", {"c"}}}, f::AttributeMap{},
+        block);
+
+  f::proto::ProgramDesc *pdesc = program.Proto();
+  f::proto::ProgramDesc optimized;
+  f::OptimizeForInference(*pdesc, &optimized);
+
+  PADDLE_ENFORCE_EQ(optimized.blocks(0).ops_size(), 2);
+  PADDLE_ENFORCE_EQ(optimized.blocks(0).ops(1).inputs(0).arguments(0), "b");
+}
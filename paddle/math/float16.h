@@ -15,6 +15,7 @@ limitations under the License. */
 #pragma once
 
 #include <stdint.h>
+#include <type_traits>
 
 #ifdef PADDLE_WITH_CUDA
 #include <cuda.h>
@@ -71,10 +72,18 @@ struct PADDLE_ALIGN(2) float16 {
 public:
   uint16_t x;
 
-  // Constructors
-  HOSTDEVICE inline float16() : x(0) {}
+  // The following defaulted special member functions keep float16 trivial
+  // and standard-layout, i.e. a POD type. Tensor::mutable_data statically
+  // requires its element type to pass std::is_pod, so a user-provided
+  // default or copy constructor here would reject float16 tensors.
+  float16() = default;
+  float16(const float16& o) = default;
+  float16& operator=(const float16& o) = default;
+  float16(float16&& o) = default;
+  float16& operator=(float16&& o) = default;
+  ~float16() = default;
 
-  HOSTDEVICE inline float16(const float16& h) : x(h.x) {}
+  // Constructors
 
 #ifdef PADDLE_CUDA_FP16
   HOSTDEVICE inline explicit float16(const half& h) {
@@ -136,11 +145,6 @@ public:
   HOSTDEVICE inline explicit float16(const T& val)
       : x(float16(static_cast<float>(val)).x) {}
 
-  HOSTDEVICE inline float16& operator=(const float16& rhs) {
-    x = rhs.x;
-    return *this;
-  }
-
 // Assignment operators
 #ifdef PADDLE_CUDA_FP16
   HOSTDEVICE inline float16& operator=(const half& rhs) {
@@ -736,4 +740,89 @@ HOSTDEVICE inline bool operator>=(const float16& a, const float16& b) {
   return float(a) >= float(b);
 }
 #endif
+
+HOSTDEVICE inline float16 raw_uint16_to_float16(uint16_t a) {
+  float16 res;
+  res.x = a;
+  return res;
+}
+
+HOSTDEVICE inline bool(isnan)(const float16& a) {
+#if defined(PADDLE_CUDA_FP16) && defined(__CUDA_ARCH__) && __CUDA_ARCH__ >= 530
+  return __hisnan(half(a));
+#else
+  return (a.x & 0x7fff) > 0x7c00;
+#endif
+}
+
+HOSTDEVICE inline bool(isinf)(const float16& a) {
+  return (a.x & 0x7fff) == 0x7c00;
+}
+
+HOSTDEVICE inline bool(isfinite)(const float16& a) {
+  return !((isnan)(a)) && !((isinf)(a));
+}
+
 }  // namespace paddle
+
+namespace std {
+// Override the std::is_pod::value for float16. Different compilers
+// implement std::is_pod based on different C++ standards; nvcc's host
+// compiler in particular rejects any user-declared constructor, so spell
+// out the C++11 definition (trivial and standard-layout) explicitly.
+template <>
+struct is_pod<paddle::float16> {
+  static const bool value = is_trivial<paddle::float16>::value &&
+                            is_standard_layout<paddle::float16>::value;
+};
+}  // namespace std
+
+namespace Eigen {
+namespace numext {
+
+template <>
+HOSTDEVICE inline bool(isnan)(const paddle::float16& a) {
+  return (paddle::isnan)(a);
+}
+
+template <>
+HOSTDEVICE inline bool(isinf)(const paddle::float16& a) {
+  return (paddle::isinf)(a);
+}
+
+template <>
+HOSTDEVICE inline bool(isfinite)(const paddle::float16& a) {
+  return (paddle::isfinite)(a);
+}
+
+}  // namespace numext
+
+template <>
+struct NumTraits<paddle::float16> : GenericNumTraits<paddle::float16> {
+  enum {
+    IsSigned = true,
+    IsInteger = false,
+    IsComplex = false,
+    RequireInitialization = false
+  };
+
+  HOSTDEVICE static inline paddle::float16 epsilon() {
+    return paddle::raw_uint16_to_float16(0x0800);
+  }
+  HOSTDEVICE static inline paddle::float16 dummy_precision() {
+    return paddle::float16(1e-2f);
+  }
+  HOSTDEVICE static inline paddle::float16 highest() {
+    return paddle::raw_uint16_to_float16(0x7bff);
+  }
+  HOSTDEVICE static inline paddle::float16 lowest() {
+    return paddle::raw_uint16_to_float16(0xfbff);
+  }
+  HOSTDEVICE static inline paddle::float16 infinity() {
+    return paddle::raw_uint16_to_float16(0x7c00);
+  }
+  HOSTDEVICE static inline paddle::float16 quiet_NaN() {
+    return paddle::raw_uint16_to_float16(0x7e00);
+  }
+};
+}  // namespace Eigen
@@ -54,8 +54,9 @@ TEST(float16, conversion_cpu) {
   EXPECT_EQ(float16(true).x, 0x3c00);
   EXPECT_EQ(float16(false).x, 0x0000);
 
-  // Default constructor
-  float16 v_def;
+  // Value initialization (the default constructor is trivial, so only
+  // an explicit initializer zeros the value)
+  float16 v_def{};
   EXPECT_EQ(v_def.x, 0x0000);
 
   // Assignment operator
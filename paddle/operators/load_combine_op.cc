@@ -0,0 +1,254 @@
+/* Copyright (c) 2018 PaddlePaddle Authors. All Rights Reserve.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License. */
+#include <zlib.h>
+#include <fstream>
+#include <sstream>
+#include <unordered_map>
+#include <vector>
+
+#include "paddle/framework/data_type.h"
+#include "paddle/framework/data_type_transform.h"
+#include "paddle/framework/op_registry.h"
+#include "paddle/platform/device_context.h"
+#include "paddle/platform/gpu_info.h"
+
+namespace paddle {
+namespace operators {
+
+// Size of the user space buffer backing the file stream, so that reading a
+// large combined checkpoint issues a few big read syscalls instead of one
+// every few KB of tensor data.
+constexpr size_t kStreamBufferSize = 4 << 20;  // 4MB
+
+// Marker save_combine writes in front of a compressed tensor frame; must
+// match the constant in save_combine_op.cc. A plain serialized tensor
+// starts with a version uint32 of 0, so the two layouts are unambiguous.
+constexpr uint32_t kCompressMagic = 0x62696c7a;
+
+// Reads one tensor from `fin`, inflating it first if it was written as a
+// compressed frame by save_combine.
+static void DeserializeOneFrom(std::istream &fin, framework::LoDTensor *tensor,
+                               const platform::DeviceContext &dev_ctx,
+                               const std::string &filename) {
+  uint32_t magic = 0;
+  fin.read(reinterpret_cast<char *>(&magic), sizeof(magic));
+  PADDLE_ENFORCE(static_cast<bool>(fin), "Cannot read more from file %s",
+                 filename);
+  if (magic != kCompressMagic) {
+    fin.seekg(-static_cast<std::streamoff>(sizeof(magic)), std::ios::cur);
+    DeserializeFromStream(fin, tensor, dev_ctx);
+    return;
+  }
+  uint64_t raw_size = 0, comp_size = 0;
+  fin.read(reinterpret_cast<char *>(&raw_size), sizeof(raw_size));
+  fin.read(reinterpret_cast<char *>(&comp_size), sizeof(comp_size));
+  std::vector<Bytef> compressed(comp_size);
+  fin.read(reinterpret_cast<char *>(compressed.data()), comp_size);
+  PADDLE_ENFORCE(static_cast<bool>(fin), "Cannot read more from file %s",
+                 filename);
+  std::string raw(raw_size, '\0');
+  uLongf dest_size = raw_size;
+  PADDLE_ENFORCE_EQ(
+      uncompress(reinterpret_cast<Bytef *>(&raw[0]), &dest_size,
+                 compressed.data(), comp_size),
+      Z_OK, "Fail to uncompress a tensor from file %s", filename);
+  std::istringstream raw_stream(raw);
+  DeserializeFromStream(raw_stream, tensor, dev_ctx);
+}
+
+class LoadCombineOp : public framework::OperatorBase {
+ public:
+  LoadCombineOp(const std::string &type,
+                const framework::VariableNameMap &inputs,
+                const framework::VariableNameMap &outputs,
+                const framework::AttributeMap &attrs)
+      : OperatorBase(type, inputs, outputs, attrs) {}
+  void Run(const framework::Scope &scope,
+           const platform::Place &place) const override {
+    auto filename = Attr<std::string>("file_path");
+    auto load_as_fp32 = Attr<bool>("load_as_fp32");
+
+    std::vector<char> stream_buffer(kStreamBufferSize);
+    std::ifstream fin;
+    fin.rdbuf()->pubsetbuf(stream_buffer.data(), stream_buffer.size());
+    fin.open(filename);
+    PADDLE_ENFORCE(static_cast<bool>(fin),
+                   "Cannot open file %s for load_combine op", filename);
+
+    auto out_var_names = Outputs("Out");
+    PADDLE_ENFORCE_GT(
+        static_cast<int>(out_var_names.size()), 0,
+        "The number of output variables should be greater than 0");
+
+    // If the save side wrote a sidecar index, tensors can be addressed
+    // directly by name, so any subset of the saved tensors can be loaded
+    // in any order. The index is only used when it covers every requested
+    // output; otherwise (old files, or outputs renamed relative to the
+    // saved variables) the file is read sequentially and the output order
+    // must match the order the tensors were saved in.
+    std::unordered_map<std::string, uint64_t> index;
+    {
+      std::ifstream idx_in(filename + ".idx");
+      std::string name;
+      uint64_t offset;
+      while (idx_in >> name >> offset) {
+        index[name] = offset;
+      }
+    }
+    for (size_t i = 0; i < out_var_names.size() && !index.empty(); i++) {
+      if (index.find(out_var_names[i]) == index.end()) {
+        index.clear();
+      }
+    }
+
+    platform::DeviceContextPool &pool = platform::DeviceContextPool::Instance();
+    auto &dev_ctx = *pool.Get(place);
+    auto &cpu_dev_ctx = *pool.Get(platform::CPUPlace());
+
+    // Host tensors staged for asynchronous H2D copies. Their memory is
+    // pinned where possible, so the copies issued below overlap with the
+    // remaining reads; they must stay alive (and pinned) until the single
+    // Wait at the end. pinned[i] records whether staging[i] was actually
+    // pinned, since ranges sharing a page with an already pinned range
+    // cannot be registered again and must not be unregistered.
+    std::vector<framework::LoDTensor> staging;
+    std::vector<bool> pinned;
+
+    for (size_t i = 0; i < out_var_names.size(); i++) {
+      auto *out_var = scope.FindVar(out_var_names[i]);
+
+      PADDLE_ENFORCE(out_var != nullptr, "Output variable %s cannot be found",
+                     out_var_names[i]);
+
+      auto *tensor = out_var->GetMutable<framework::LoDTensor>();
+
+      if (!index.empty()) {
+        auto it = index.find(out_var_names[i]);
+        PADDLE_ENFORCE(it != index.end(),
+                       "Cannot find variable %s in the index of %s",
+                       out_var_names[i], filename);
+        fin.clear();
+        fin.seekg(static_cast<std::streamoff>(it->second), std::ios::beg);
+      }
+
+      // Error checking
+      PADDLE_ENFORCE(static_cast<bool>(fin), "Cannot read more from file %s",
+                     filename);
+
+      if (load_as_fp32) {
+        // Deserialize on the CPU so the tensor can be widened back to
+        // float32 before it is copied to the final place.
+        framework::LoDTensor cpu_tensor;
+        DeserializeOneFrom(fin, &cpu_tensor, cpu_dev_ctx, filename);
+        if (framework::ToDataType(cpu_tensor.type()) ==
+            framework::proto::DataType::FP16) {
+          auto in_kernel_type = framework::OpKernelType(
+              framework::proto::DataType::FP16, platform::CPUPlace());
+          auto out_kernel_type = framework::OpKernelType(
+              framework::proto::DataType::FP32, platform::CPUPlace());
+          framework::LoDTensor fp32_tensor;
+          framework::TransDataType(in_kernel_type, out_kernel_type, cpu_tensor,
+                                   &fp32_tensor);
+          fp32_tensor.set_lod(cpu_tensor.lod());
+          cpu_tensor = fp32_tensor;
+        }
+        tensor->set_lod(cpu_tensor.lod());
+        if (platform::is_gpu_place(place)) {
+          staging.push_back(cpu_tensor);
+#ifdef PADDLE_WITH_CUDA
+          pinned.push_back(platform::TryGpuHostRegister(
+              staging.back().mutable_data(platform::CPUPlace()),
+              staging.back().memory_size()));
+#endif
+          Copy(staging.back(), place, dev_ctx, tensor);
+        } else {
+          tensor->ShareDataWith(cpu_tensor);
+        }
+        continue;
+      }
+
+      if (platform::is_gpu_place(place)) {
+        // Deserialize into pinned host staging and issue an asynchronous
+        // copy, so reading the next tensor overlaps with the transfer.
+        framework::LoDTensor cpu_tensor;
+        DeserializeOneFrom(fin, &cpu_tensor, cpu_dev_ctx, filename);
+        tensor->set_lod(cpu_tensor.lod());
+        staging.push_back(cpu_tensor);
+#ifdef PADDLE_WITH_CUDA
+        pinned.push_back(platform::TryGpuHostRegister(
+            staging.back().mutable_data(platform::CPUPlace()),
+            staging.back().memory_size()));
+#endif
+        Copy(staging.back(), place, dev_ctx, tensor);
+      } else {
+        // Get data from fin to tensor
+        DeserializeOneFrom(fin, tensor, dev_ctx, filename);
+      }
+    }
+
+#ifdef PADDLE_WITH_CUDA
+    if (!staging.empty()) {
+      // Wait once for all in-flight copies, then unpin the ranges that
+      // were actually pinned.
+      dev_ctx.Wait();
+      for (size_t i = 0; i < staging.size(); i++) {
+        if (pinned[i]) {
+          platform::GpuHostUnregister(
+              staging[i].mutable_data(platform::CPUPlace()));
+        }
+      }
+    }
+#endif
+  }
+};
+
+class LoadCombineOpProtoMaker : public framework::OpProtoAndCheckerMaker {
+ public:
+  LoadCombineOpProtoMaker(OpProto *proto, OpAttrChecker *op_checker)
+      : OpProtoAndCheckerMaker(proto, op_checker) {
+    AddOutput(
+        "Out",
+        "(vector) The output LoDTensors that will be read from the input file.")
+        .AsDuplicable();
+    AddAttr<std::string>("file_path",
+                         "(string) "
+                         "LoDTensors will be loaded from \"file_path\".")
+        .AddCustomChecker(
+            [](const std::string &path) { return !path.empty(); });
+    AddAttr<bool>("load_as_fp32",
+                  "(boolean, default false)"
+                  "If true, float16 tensors in the file are cast back to "
+                  "float32 after they are read, for programs that expect "
+                  "float32 parameters.")
+        .SetDefault(false);
+    AddComment(R"DOC(
+LoadCombine Operator.
+
+LoadCombine operator loads LoDTensor variables from a file. The file should
+contain one or more LoDTensors serialized using the SaveCombine operator. The
+LoadCombine operator applies a deserialization strategy to appropriately load
+the LodTensors, and this strategy complements the serialization strategy used
+in the SaveCombine operator. Hence, the LoadCombine operator is tightly coupled
+with the SaveCombine operator, and can only deserialize one or more LoDTensors
+that were saved using the SaveCombine operator.
+
+)DOC");
+  }
+};
+}  // namespace operators
+}  // namespace paddle
+namespace ops = paddle::operators;
+
+REGISTER_OPERATOR(load_combine, ops::LoadCombineOp,
+                  ops::LoadCombineOpProtoMaker);
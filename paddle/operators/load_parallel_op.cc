@@ -0,0 +1,171 @@
+/* Copyright (c) 2018 PaddlePaddle Authors. All Rights Reserve.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License. */
+#include <fstream>
+#include <future>
+#include <vector>
+
+#include "paddle/framework/data_type.h"
+#include "paddle/framework/data_type_transform.h"
+#include "paddle/framework/op_registry.h"
+#include "paddle/framework/threadpool.h"
+#include "paddle/platform/device_context.h"
+#include "paddle/platform/gpu_info.h"
+
+namespace paddle {
+namespace operators {
+
+class LoadParallelOp : public framework::OperatorBase {
+ public:
+  LoadParallelOp(const std::string &type,
+                 const framework::VariableNameMap &inputs,
+                 const framework::VariableNameMap &outputs,
+                 const framework::AttributeMap &attrs)
+      : OperatorBase(type, inputs, outputs, attrs) {}
+  void Run(const framework::Scope &scope,
+           const platform::Place &place) const override {
+    auto file_paths = Attr<std::vector<std::string>>("file_paths");
+    auto load_as_fp32 = Attr<bool>("load_as_fp32");
+
+    auto out_var_names = Outputs("Out");
+    PADDLE_ENFORCE_GT(
+        static_cast<int>(out_var_names.size()), 0,
+        "The number of output variables should be greater than 0");
+    PADDLE_ENFORCE_EQ(out_var_names.size(), file_paths.size(),
+                      "The number of file paths should match the number of "
+                      "output variables");
+
+    platform::DeviceContextPool &pool = platform::DeviceContextPool::Instance();
+    auto &dev_ctx = *pool.Get(place);
+    auto &cpu_dev_ctx = *pool.Get(platform::CPUPlace());
+
+    // Each worker reads and deserializes one file into CPU memory. The
+    // output variables were created by the executor before the op runs, so
+    // the scope is only read concurrently, never mutated.
+    auto load_one = [&](size_t i) {
+      std::ifstream fin(file_paths[i]);
+      PADDLE_ENFORCE(static_cast<bool>(fin), "Cannot open file %s for load op",
+                     file_paths[i]);
+      auto *out_var = scope.FindVar(out_var_names[i]);
+      PADDLE_ENFORCE(out_var != nullptr, "Output variable %s cannot be found",
+                     out_var_names[i]);
+      auto *tensor = out_var->GetMutable<framework::LoDTensor>();
+      DeserializeFromStream(fin, tensor, cpu_dev_ctx);
+      if (load_as_fp32 && framework::ToDataType(tensor->type()) ==
+                              framework::proto::DataType::FP16) {
+        auto in_kernel_type = framework::OpKernelType(
+            framework::proto::DataType::FP16, platform::CPUPlace());
+        auto out_kernel_type = framework::OpKernelType(
+            framework::proto::DataType::FP32, platform::CPUPlace());
+        framework::LoDTensor fp32_tensor;
+        framework::TransDataType(in_kernel_type, out_kernel_type, *tensor,
+                                 &fp32_tensor);
+        fp32_tensor.set_lod(tensor->lod());
+        tensor->ShareDataWith(fp32_tensor);
+      }
+    };
+
+    std::vector<std::future<void>> workers;
+    workers.reserve(out_var_names.size());
+    for (size_t i = 0; i < out_var_names.size(); i++) {
+      workers.emplace_back(framework::Async([&load_one, i] { load_one(i); }));
+    }
+    // Wait for every worker before collecting results, so load_one is not
+    // referenced after an early rethrow; then get() each future, which
+    // rethrows any error raised inside a worker. wait() alone would leave
+    // the stored exception unobserved and deliver uninitialized tensors.
+    for (auto &worker : workers) {
+      worker.wait();
+    }
+    for (auto &worker : workers) {
+      worker.get();
+    }
+
+    if (platform::is_gpu_place(place)) {
+      // Pin each host staging buffer where possible and issue its copy on
+      // the device context's stream; the copies run back to back without a
+      // pageable-memory staging pass, and the stream is synchronized once
+      // before the buffers are unpinned. pinned[i] records whether
+      // staging[i] could actually be pinned: buffers sub-allocated from a
+      // chunk that already has pinned pages cannot be registered again and
+      // must not be unregistered.
+      std::vector<framework::LoDTensor> staging;
+      std::vector<bool> pinned;
+      staging.reserve(out_var_names.size());
+      for (size_t i = 0; i < out_var_names.size(); i++) {
+        auto *out_var = scope.FindVar(out_var_names[i]);
+        auto *tensor = out_var->GetMutable<framework::LoDTensor>();
+
+        framework::LoDTensor cpu_tensor;
+        cpu_tensor.ShareDataWith(*tensor);
+        cpu_tensor.set_lod(tensor->lod());
+
+        // reset tensor
+        out_var->Clear();
+        tensor = out_var->GetMutable<framework::LoDTensor>();
+        tensor->set_lod(cpu_tensor.lod());
+        staging.push_back(cpu_tensor);
+#ifdef PADDLE_WITH_CUDA
+        pinned.push_back(platform::TryGpuHostRegister(
+            staging.back().mutable_data(platform::CPUPlace()),
+            staging.back().memory_size()));
+#endif
+        Copy(staging.back(), place, dev_ctx, tensor);
+      }
+#ifdef PADDLE_WITH_CUDA
+      dev_ctx.Wait();
+      for (size_t i = 0; i < staging.size(); i++) {
+        if (pinned[i]) {
+          platform::GpuHostUnregister(
+              staging[i].mutable_data(platform::CPUPlace()));
+        }
+      }
+#endif
+    }
+  }
+};
+
+class LoadParallelOpProtoMaker : public framework::OpProtoAndCheckerMaker {
+ public:
+  LoadParallelOpProtoMaker(OpProto *proto, OpAttrChecker *op_checker)
+      : OpProtoAndCheckerMaker(proto, op_checker) {
+    AddOutput("Out",
+              "(vector) The LoDTensors that will be read, one file per tensor.")
+        .AsDuplicable();
+    AddAttr<std::vector<std::string>>(
+        "file_paths",
+        "(vector of strings) "
+        "The files the variables will be loaded from, one per output "
+        "variable.");
+    AddAttr<bool>("load_as_fp32",
+                  "(boolean, default false)"
+                  "If true, float16 tensors in the files are cast back to "
+                  "float32 after they are read, for programs that expect "
+                  "float32 parameters.")
+        .SetDefault(false);
+    AddComment(R"DOC(
+LoadParallel Operator.
+
+LoadParallel operator loads each output LoDTensor variable from its own
+file, reading the files concurrently on the global thread pool. Each file
+must have been written by the save or save_parallel operator.
+
+)DOC");
+  }
+};
+}  // namespace operators
+}  // namespace paddle
+namespace ops = paddle::operators;
+
+REGISTER_OPERATOR(load_parallel, ops::LoadParallelOp,
+                  ops::LoadParallelOpProtoMaker);
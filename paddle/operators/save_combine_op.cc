@@ -0,0 +1,263 @@
+/* Copyright (c) 2018 PaddlePaddle Authors. All Rights Reserve.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License. */
+
+#include <ctype.h>
+#include <stdint.h>
+#include <sys/stat.h>
+#include <zlib.h>
+#include <fstream>
+#include <numeric>
+#include <sstream>
+#include <vector>
+
+#include "paddle/framework/data_type.h"
+#include "paddle/framework/data_type_transform.h"
+#include "paddle/framework/framework.pb.h"
+#include "paddle/framework/lod_tensor.h"
+#include "paddle/framework/op_registry.h"
+#include "paddle/platform/device_context.h"
+
+namespace paddle {
+namespace operators {
+
+// Size of the user space buffer backing the file stream. The default stdio
+// buffer is only a few KB, which makes serializing a large checkpoint issue
+// a syscall every few KB of tensor data.
+constexpr size_t kStreamBufferSize = 4 << 20;  // 4MB
+
+// Marker written in front of each compressed tensor frame; the file bytes
+// read "zlib". A plain serialized tensor starts with a version uint32 of 0,
+// so the reader can tell the two layouts apart and old files stay loadable.
+constexpr uint32_t kCompressMagic = 0x62696c7a;
+
+// TODO(sidgoyal78): These function are needed by other files (save_op), move
+// them to paddle::filesystem namespace. (as noted by yuyang18 in save_op).
+constexpr char kSEP = '/';
+static bool FileExists(const std::string &filepath) {
+  struct stat buffer;
+  return (stat(filepath.c_str(), &buffer) == 0);
+}
+
+static std::string DirName(const std::string &filepath) {
+  auto pos = filepath.rfind(kSEP);
+  if (pos == std::string::npos) {
+    return "";
+  }
+  return filepath.substr(0, pos);
+}
+
+static void MkDir(const char *path) {
+  if (mkdir(path, 0755)) {
+    PADDLE_ENFORCE_EQ(errno, EEXIST, "%s mkdir failed!", path);
+  }
+}
+
+static void MkDirRecursively(const char *fullpath) {
+  if (*fullpath == '\0') return;  // empty string
+  if (FileExists(fullpath)) return;
+
+  MkDirRecursively(DirName(fullpath).c_str());
+  MkDir(fullpath);
+}
+
+class SaveCombineOp : public framework::OperatorBase {
+ public:
+  SaveCombineOp(const std::string &type,
+                const framework::VariableNameMap &inputs,
+                const framework::VariableNameMap &outputs,
+                const framework::AttributeMap &attrs)
+      : OperatorBase(type, inputs, outputs, attrs) {}
+  void Run(const framework::Scope &scope,
+           const platform::Place &place) const override {
+    auto filename = Attr<std::string>("file_path");
+    auto overwrite = Attr<bool>("overwrite");
+    auto save_as_fp16 = Attr<bool>("save_as_fp16");
+    auto compression = Attr<std::string>("compression");
+
+    int compression_level = -1;  // negative means no compression
+    if (!compression.empty()) {
+      PADDLE_ENFORCE_EQ(compression.compare(0, 4, "zlib"), 0,
+                        "Unsupported compression %s; only \"zlib\" and "
+                        "\"zlib:<level>\" are supported",
+                        compression);
+      compression_level = Z_DEFAULT_COMPRESSION;
+      if (compression.size() > 4) {
+        PADDLE_ENFORCE_EQ(compression[4], ':',
+                          "Malformed compression attribute %s", compression);
+        // zlib levels are the single digits 0-9.
+        PADDLE_ENFORCE(compression.size() == 6 &&
+                           isdigit(static_cast<unsigned char>(compression[5])),
+                       "Compression level in %s should be a digit in [0, 9]",
+                       compression);
+        compression_level = compression[5] - '0';
+      }
+    }
+
+    bool is_present = FileExists(filename);
+    if (is_present && !overwrite) {
+      PADDLE_THROW("%s exists!, cannot save_combine to it when overwrite=false",
+                   filename, overwrite);
+    }
+
+    MkDirRecursively(DirName(filename).c_str());
+
+    // Use a large stream buffer so that writing many tensors issues a few
+    // big write syscalls instead of thousands of small ones.
+    std::vector<char> stream_buffer(kStreamBufferSize);
+    std::ofstream fout;
+    fout.rdbuf()->pubsetbuf(stream_buffer.data(), stream_buffer.size());
+    fout.open(filename);
+    PADDLE_ENFORCE(static_cast<bool>(fout), "Cannot open %s to write",
+                   filename);
+
+    auto inp_var_names = Inputs("X");
+    PADDLE_ENFORCE_GT(static_cast<int>(inp_var_names.size()), 0,
+                      "The number of input variables should be greater than 0");
+
+    // get device context from pool
+    platform::DeviceContextPool &pool = platform::DeviceContextPool::Instance();
+    auto &dev_ctx = *pool.Get(place);
+
+    // Offsets of each tensor inside the combined file, written to a sidecar
+    // index so readers can address tensors directly instead of scanning.
+    std::vector<uint64_t> offsets(inp_var_names.size());
+
+    for (size_t i = 0; i < inp_var_names.size(); i++) {
+      offsets[i] = static_cast<uint64_t>(fout.tellp());
+      auto *var = scope.FindVar(inp_var_names[i]);
+
+      PADDLE_ENFORCE(var != nullptr,
+                     "Cannot find variable %s for save_combine_op",
+                     inp_var_names[i]);
+      PADDLE_ENFORCE(var->IsType<framework::LoDTensor>(),
+                     "SaveCombineOp only supports LoDTensor, %s has wrong type",
+                     inp_var_names[i]);
+
+      auto &tensor = var->Get<framework::LoDTensor>();
+      auto in_dtype = framework::ToDataType(tensor.type());
+      // Only float tensors are narrowed; integer tensors (e.g. ids) keep
+      // their type even when save_as_fp16 is set.
+      framework::LoDTensor fp16_tensor;
+      const framework::LoDTensor *out_tensor = &tensor;
+      if (save_as_fp16 && (in_dtype == framework::proto::DataType::FP32 ||
+                           in_dtype == framework::proto::DataType::FP64)) {
+        auto cpu_place = platform::CPUPlace();
+        framework::LoDTensor cpu_tensor;
+        const framework::LoDTensor *in_tensor = &tensor;
+        if (platform::is_gpu_place(tensor.place())) {
+          // TransDataType only runs on the CPU, so bring the tensor over
+          // first; the plain path below does the same inside
+          // SerializeToStream.
+          framework::Copy(tensor, cpu_place, dev_ctx, &cpu_tensor);
+          dev_ctx.Wait();
+          in_tensor = &cpu_tensor;
+        }
+        auto in_kernel_type = framework::OpKernelType(in_dtype, cpu_place);
+        auto out_kernel_type = framework::OpKernelType(
+            framework::proto::DataType::FP16, cpu_place);
+        framework::TransDataType(in_kernel_type, out_kernel_type, *in_tensor,
+                                 &fp16_tensor);
+        fp16_tensor.set_lod(tensor.lod());
+        out_tensor = &fp16_tensor;
+      }
+
+      if (compression_level < 0) {
+        framework::SerializeToStream(fout, *out_tensor, dev_ctx);
+      } else {
+        // Serialize to memory, deflate, and write the compressed frame:
+        // magic, raw size, compressed size, payload.
+        std::ostringstream raw_stream;
+        framework::SerializeToStream(raw_stream, *out_tensor, dev_ctx);
+        const std::string &raw = raw_stream.str();
+        uLongf compressed_size = compressBound(raw.size());
+        std::vector<Bytef> compressed(compressed_size);
+        PADDLE_ENFORCE_EQ(
+            compress2(compressed.data(), &compressed_size,
+                      reinterpret_cast<const Bytef *>(raw.data()), raw.size(),
+                      compression_level),
+            Z_OK, "Fail to compress variable %s", inp_var_names[i]);
+        uint32_t magic = kCompressMagic;
+        uint64_t raw_size = raw.size();
+        uint64_t comp_size = compressed_size;
+        fout.write(reinterpret_cast<const char *>(&magic), sizeof(magic));
+        fout.write(reinterpret_cast<const char *>(&raw_size),
+                   sizeof(raw_size));
+        fout.write(reinterpret_cast<const char *>(&comp_size),
+                   sizeof(comp_size));
+        fout.write(reinterpret_cast<const char *>(compressed.data()),
+                   comp_size);
+      }
+    }
+    fout.close();
+
+    // One "name offset" line per tensor. The index lets load_combine seek
+    // straight to any tensor by name; readers that predate it simply read
+    // the combined file sequentially.
+    std::ofstream idx_out(filename + ".idx");
+    PADDLE_ENFORCE(static_cast<bool>(idx_out), "Cannot open %s.idx to write",
+                   filename);
+    for (size_t i = 0; i < inp_var_names.size(); i++) {
+      idx_out << inp_var_names[i] << " " << offsets[i] << "\n";
+    }
+  }
+};
+
+class SaveCombineOpProtoMaker : public framework::OpProtoAndCheckerMaker {
+ public:
+  SaveCombineOpProtoMaker(OpProto *proto, OpAttrChecker *op_checker)
+      : OpProtoAndCheckerMaker(proto, op_checker) {
+    AddInput(
+        "X",
+        "(vector) Input LoDTensors that need to be saved together in a file.")
+        .AsDuplicable();
+    AddComment(R"DOC(
+SaveCombine operator
+
+This operator will serialize and write a list of input LoDTensor variables
+to a file on disk.
+)DOC");
+    AddAttr<bool>("overwrite",
+                  "(boolean, default true)"
+                  "Overwrite the output file if it exists.")
+        .SetDefault(true);
+    AddAttr<bool>("save_as_fp16",
+                  "(boolean, default false)"
+                  "If true, float32/float64 tensors are cast to float16 "
+                  "before they are written, halving the checkpoint size at "
+                  "some precision cost.")
+        .SetDefault(false);
+    AddAttr<std::string>(
+        "compression",
+        "(string, default \"\")"
+        "If set to \"zlib\" or \"zlib:<level>\", each tensor is deflated "
+        "before it is written. The load_combine operator detects compressed "
+        "tensors by a frame marker, so no matching attribute is needed on "
+        "the load side.")
+        .SetDefault("");
+    AddAttr<std::string>(
+        "file_path",
+        "(string)"
+        "The \"file_path\" where the LoDTensor variables will be saved.")
+        .AddCustomChecker(
+            [](const std::string &path) { return !path.empty(); });
+  }
+};
+
+}  // namespace operators
+}  // namespace paddle
+
+namespace ops = paddle::operators;
+
+REGISTER_OPERATOR(save_combine, ops::SaveCombineOp,
+                  ops::SaveCombineOpProtoMaker);
@@ -0,0 +1,116 @@
+/* Copyright (c) 2018 PaddlePaddle Authors. All Rights Reserve.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License. */
+
+#include <fstream>
+#include <string>
+#include <vector>
+#include "gtest/gtest.h"
+#include "paddle/framework/op_registry.h"
+
+USE_NO_KERNEL_OP(save_parallel);
+USE_NO_KERNEL_OP(load_parallel);
+
+// The parallel ops write/read each tensor in its own file; a round trip
+// through both must reproduce data and LoD.
+TEST(SaveLoadParallelOp, CPU) {
+  paddle::framework::Scope scope;
+  paddle::platform::CPUPlace place;
+
+  std::vector<std::string> var_names = {"test_var1", "test_var2"};
+  std::vector<int*> expects;
+  for (size_t i = 0; i < var_names.size(); i++) {
+    auto var = scope.Var(var_names[i]);
+    auto tensor = var->GetMutable<paddle::framework::LoDTensor>();
+    tensor->Resize({10, 10});
+    paddle::framework::LoD lod;
+    lod.resize(1);
+    lod[0].push_back(0);
+    lod[0].push_back(10);
+    tensor->set_lod(lod);
+    int* expect = tensor->mutable_data<int>(place);
+    for (int64_t j = 0; j < tensor->numel(); ++j) {
+      expect[j] = static_cast<int>(j + i);
+    }
+    expects.push_back(expect);
+  }
+
+  paddle::framework::AttributeMap attrs;
+  attrs.insert({"file_paths", std::vector<std::string>(
+                                  {"parallel_var1.ls", "parallel_var2.ls"})});
+
+  auto save_op = paddle::framework::OpRegistry::CreateOp(
+      "save_parallel", {{"X", {"test_var1", "test_var2"}}}, {}, attrs);
+  save_op->Run(scope, place);
+
+  paddle::framework::Scope load_scope;
+  for (size_t i = 0; i < var_names.size(); i++) {
+    load_scope.Var(var_names[i])->GetMutable<paddle::framework::LoDTensor>();
+  }
+  auto load_op = paddle::framework::OpRegistry::CreateOp(
+      "load_parallel", {}, {{"Out", {"test_var1", "test_var2"}}}, attrs);
+  load_op->Run(load_scope, place);
+
+  for (size_t i = 0; i < var_names.size(); i++) {
+    auto& actual_tensor = load_scope.FindVar(var_names[i])
+                              ->Get<paddle::framework::LoDTensor>();
+    const int* actual = actual_tensor.data<int>();
+    for (int64_t j = 0; j < actual_tensor.numel(); ++j) {
+      EXPECT_EQ(expects[i][j], actual[j]);
+    }
+    EXPECT_EQ(actual_tensor.lod().size(), 1UL);
+    EXPECT_EQ(actual_tensor.lod()[0].back(), 10UL);
+  }
+}
+
+// Errors raised inside the thread-pool workers must surface to the caller
+// instead of being swallowed by the stored futures.
+TEST(LoadParallelOp, MissingFileThrows) {
+  paddle::framework::Scope scope;
+  paddle::platform::CPUPlace place;
+
+  scope.Var("missing_var")->GetMutable<paddle::framework::LoDTensor>();
+
+  paddle::framework::AttributeMap attrs;
+  attrs.insert({"file_paths",
+                std::vector<std::string>({"no_such_parallel_file.ls"})});
+
+  auto load_op = paddle::framework::OpRegistry::CreateOp(
+      "load_parallel", {}, {{"Out", {"missing_var"}}}, attrs);
+  EXPECT_THROW(load_op->Run(scope, place),
+               paddle::platform::EnforceNotMet);
+}
+
+TEST(SaveParallelOp, UnwritablePathThrows) {
+  paddle::framework::Scope scope;
+  paddle::platform::CPUPlace place;
+
+  auto var = scope.Var("test_var1");
+  auto tensor = var->GetMutable<paddle::framework::LoDTensor>();
+  tensor->Resize({4, 4});
+  tensor->mutable_data<int>(place);
+
+  // A path whose parent is a regular file cannot be created.
+  {
+    std::ofstream blocker("parallel_not_a_dir");
+    blocker << "x";
+  }
+  paddle::framework::AttributeMap attrs;
+  attrs.insert({"file_paths",
+                std::vector<std::string>({"parallel_not_a_dir/test_var1"})});
+
+  auto save_op = paddle::framework::OpRegistry::CreateOp(
+      "save_parallel", {{"X", {"test_var1"}}}, {}, attrs);
+  EXPECT_THROW(save_op->Run(scope, place),
+               paddle::platform::EnforceNotMet);
+}
@@ -0,0 +1,202 @@
+/* Copyright (c) 2018 PaddlePaddle Authors. All Rights Reserve.
+
+Licensed under the Apache License, Version 2.0 (the "License");
+you may not use this file except in compliance with the License.
+You may obtain a copy of the License at
+
+    http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software
+distributed under the License is distributed on an "AS IS" BASIS,
+WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+See the License for the specific language governing permissions and
+limitations under the License. */
+
+#include <stdint.h>
+#include <sys/stat.h>
+#include <fstream>
+#include <future>
+#include <vector>
+
+#include "paddle/framework/data_type.h"
+#include "paddle/framework/data_type_transform.h"
+#include "paddle/framework/framework.pb.h"
+#include "paddle/framework/lod_tensor.h"
+#include "paddle/framework/op_registry.h"
+#include "paddle/framework/threadpool.h"
+#include "paddle/platform/device_context.h"
+
+namespace paddle {
+namespace operators {
+
+// TODO(yuyang18): If the functions below are needed by other files, move them
+// to paddle::filesystem namespace.
+constexpr char kSEP = '/';
+static bool FileExists(const std::string &filepath) {
+  struct stat buffer;
+  return (stat(filepath.c_str(), &buffer) == 0);
+}
+
+static std::string DirName(const std::string &filepath) {
+  auto pos = filepath.rfind(kSEP);
+  if (pos == std::string::npos) {
+    return "";
+  }
+  return filepath.substr(0, pos);
+}
+
+static void MkDir(const char *path) {
+  if (mkdir(path, 0755)) {
+    PADDLE_ENFORCE_EQ(errno, EEXIST, "%s mkdir failed!", path);
+  }
+}
+
+static void MkDirRecursively(const char *fullpath) {
+  if (*fullpath == '\0') return;  // empty string
+  if (FileExists(fullpath)) return;
+
+  MkDirRecursively(DirName(fullpath).c_str());
+  MkDir(fullpath);
+}
+
+class SaveParallelOp : public framework::OperatorBase {
+ public:
+  SaveParallelOp(const std::string &type,
+                 const framework::VariableNameMap &inputs,
+                 const framework::VariableNameMap &outputs,
+                 const framework::AttributeMap &attrs)
+      : OperatorBase(type, inputs, outputs, attrs) {}
+  void Run(const framework::Scope &scope,
+           const platform::Place &place) const override {
+    auto file_paths = Attr<std::vector<std::string>>("file_paths");
+    auto overwrite = Attr<bool>("overwrite");
+    auto save_as_fp16 = Attr<bool>("save_as_fp16");
+
+    auto inp_var_names = Inputs("X");
+    PADDLE_ENFORCE_GT(static_cast<int>(inp_var_names.size()), 0,
+                      "The number of input variables should be greater than 0");
+    PADDLE_ENFORCE_EQ(inp_var_names.size(), file_paths.size(),
+                      "The number of file paths should match the number of "
+                      "input variables");
+
+    for (size_t i = 0; i < file_paths.size(); i++) {
+      if (FileExists(file_paths[i]) && !overwrite) {
+        PADDLE_THROW("%s is existed, cannot save to it when overwrite=false",
+                     file_paths[i], overwrite);
+      }
+      MkDirRecursively(DirName(file_paths[i]).c_str());
+    }
+
+    // get device context from pool
+    platform::DeviceContextPool &pool = platform::DeviceContextPool::Instance();
+    auto &dev_ctx = *pool.Get(place);
+
+    auto save_one = [&](size_t i) {
+      auto *var = scope.FindVar(inp_var_names[i]);
+      PADDLE_ENFORCE(var != nullptr, "Cannot find variable %s for save_op",
+                     inp_var_names[i]);
+      PADDLE_ENFORCE(
+          var->IsType<framework::LoDTensor>(),
+          "SaveParallelOp only supports LoDTensor, %s has wrong type",
+          inp_var_names[i]);
+
+      auto &tensor = var->Get<framework::LoDTensor>();
+      std::ofstream fout(file_paths[i]);
+      PADDLE_ENFORCE(static_cast<bool>(fout), "Cannot open %s to write",
+                     file_paths[i]);
+      auto in_dtype = framework::ToDataType(tensor.type());
+      // Only float tensors are narrowed; integer tensors (e.g. ids) keep
+      // their type even when save_as_fp16 is set.
+      if (save_as_fp16 && (in_dtype == framework::proto::DataType::FP32 ||
+                           in_dtype == framework::proto::DataType::FP64)) {
+        auto cpu_place = platform::CPUPlace();
+        framework::LoDTensor cpu_tensor;
+        const framework::LoDTensor *in_tensor = &tensor;
+        if (platform::is_gpu_place(tensor.place())) {
+          // TransDataType only runs on the CPU, so bring the tensor over
+          // first; the plain path below does the same inside
+          // SerializeToStream. GPU tensors are saved by the serial loop,
+          // so sharing dev_ctx here is safe.
+          framework::Copy(tensor, cpu_place, dev_ctx, &cpu_tensor);
+          dev_ctx.Wait();
+          in_tensor = &cpu_tensor;
+        }
+        auto in_kernel_type = framework::OpKernelType(in_dtype, cpu_place);
+        auto out_kernel_type = framework::OpKernelType(
+            framework::proto::DataType::FP16, cpu_place);
+        framework::LoDTensor fp16_tensor;
+        framework::TransDataType(in_kernel_type, out_kernel_type, *in_tensor,
+                                 &fp16_tensor);
+        fp16_tensor.set_lod(tensor.lod());
+        framework::SerializeToStream(fout, fp16_tensor, dev_ctx);
+      } else {
+        framework::SerializeToStream(fout, tensor, dev_ctx);
+      }
+    };
+
+    if (platform::is_gpu_place(place)) {
+      // Serializing a GPU tensor issues copies on the device context's
+      // stream, which is not thread safe, so fall back to a serial loop.
+      for (size_t i = 0; i < inp_var_names.size(); i++) {
+        save_one(i);
+      }
+    } else {
+      std::vector<std::future<void>> workers;
+      workers.reserve(inp_var_names.size());
+      for (size_t i = 0; i < inp_var_names.size(); i++) {
+        workers.emplace_back(framework::Async([&save_one, i] { save_one(i); }));
+      }
+      // Wait for every worker before collecting results, so save_one is
+      // not referenced after an early rethrow; then get() each future,
+      // which rethrows any error raised inside a worker. wait() alone
+      // would leave the stored exception unobserved and report a failed
+      // save as success.
+      for (auto &worker : workers) {
+        worker.wait();
+      }
+      for (auto &worker : workers) {
+        worker.get();
+      }
+    }
+  }
+};
+
+class SaveParallelOpProtoMaker : public framework::OpProtoAndCheckerMaker {
+ public:
+  SaveParallelOpProtoMaker(OpProto *proto, OpAttrChecker *op_checker)
+      : OpProtoAndCheckerMaker(proto, op_checker) {
+    AddInput("X",
+             "(vector) Input LoDTensors that need to be saved, one file "
+             "per tensor.")
+        .AsDuplicable();
+    AddComment(R"DOC(
+SaveParallel operator
+
+This operator serializes each input LoDTensor variable to its own file,
+writing the files concurrently on the global thread pool. The on-disk
+format of each file is identical to the one produced by the save operator.
+)DOC");
+    AddAttr<bool>("overwrite",
+                  "(boolean, default true)"
+                  "Overwrite the output files if they exist.")
+        .SetDefault(true);
+    AddAttr<bool>("save_as_fp16",
+                  "(boolean, default false)"
+                  "If true, float32/float64 tensors are cast to float16 "
+                  "before they are written, halving the checkpoint size at "
+                  "some precision cost.")
+        .SetDefault(false);
+    AddAttr<std::vector<std::string>>(
+        "file_paths",
+        "(vector of strings)"
+        "The files the variables will be saved to, one per input variable.");
+  }
+};
+
+}  // namespace operators
+}  // namespace paddle
+
+namespace ops = paddle::operators;
+
+REGISTER_OPERATOR(save_parallel, ops::SaveParallelOp,
+                  ops::SaveParallelOpProtoMaker);
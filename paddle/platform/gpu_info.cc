@@ -108,5 +108,27 @@ void GpuMemsetAsync(void *dst, int value, size_t count, cudaStream_t stream) {
   PADDLE_ENFORCE(cudaMemsetAsync(dst, value, count, stream),
                  "cudaMemsetAsync failed in paddle::platform::GpuMemsetAsync");
 }
+
+bool TryGpuHostRegister(void *ptr, size_t size) {
+  cudaError_t result = cudaHostRegister(ptr, size, cudaHostRegisterDefault);
+  if (result == cudaErrorHostMemoryAlreadyRegistered) {
+    // Pinning works at page granularity and the CPU allocator hands out
+    // sub-ranges of large shared chunks, so this range may share a page
+    // with one that is already pinned. Pinning is only an optimization;
+    // clear the sticky error and let the caller fall back to a pageable
+    // copy.
+    cudaGetLastError();
+    return false;
+  }
+  PADDLE_ENFORCE(
+      result, "cudaHostRegister failed in paddle::platform::TryGpuHostRegister");
+  return true;
+}
+
+void GpuHostUnregister(void *ptr) {
+  PADDLE_ENFORCE(
+      cudaHostUnregister(ptr),
+      "cudaHostUnregister failed in paddle::platform::GpuHostUnregister");
+}
 }  // namespace platform
 }  // namespace paddle
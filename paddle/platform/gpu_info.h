@@ -59,6 +59,16 @@ void GpuMemcpyPeer(void *dst, int dst_device, const void *src, int src_device,
 //! Set memory dst with value count size asynchronously
 void GpuMemsetAsync(void *dst, int value, size_t count, cudaStream_t stream);
 
+//! Try to pin the host memory range [ptr, ptr + size) so copies from it
+//! can be truly asynchronous. Returns false if the range overlaps pages
+//! that are already pinned, which happens when the range was sub-allocated
+//! from a buddy allocator chunk shared with another pinned range; the
+//! caller must not unpin a range this returned false for.
+bool TryGpuHostRegister(void *ptr, size_t size);
+
+//! Unpin a host memory range previously pinned with TryGpuHostRegister.
+void GpuHostUnregister(void *ptr);
+
 }  // namespace platform
 }  // namespace paddle
 
@@ -15,6 +15,7 @@ limitations under the License. */
 #include "paddle/pybind/protobuf.h"
 #include <deque>
 #include <iostream>
+#include <tuple>
 #include "paddle/framework/backward.h"
 #include "paddle/framework/block_desc.h"
 #include "paddle/framework/op_desc.h"
@@ -119,6 +120,16 @@ void BindProgramDesc(py::module &m) {
              std::string str(binary_str);
              new (&self) ProgramDesc(str);
            })
+      .def("__init__",
+           [](ProgramDesc &self, py::buffer binary_buffer) {
+             // Accept any object exposing the buffer protocol, e.g. an
+             // mmap of the __model__ file, and parse the program straight
+             // out of the buffer without copying it to a std::string.
+             py::buffer_info info = binary_buffer.request();
+             new (&self) ProgramDesc(
+                 reinterpret_cast<const char *>(info.ptr),
+                 static_cast<size_t>(info.size) * info.itemsize);
+           })
       .def("append_block", &ProgramDesc::AppendBlock,
            py::return_value_policy::reference)
       .def("append_backward",
@@ -188,7 +199,38 @@ void BindBlockDesc(py::module &m) {
              return self.FindVarRecursive(name);
            },
            py::return_value_policy::reference)
+      .def("create_vars_bulk",
+           [](BlockDesc &self, const std::vector<py::bytes> &var_protos) {
+             // Append many variables in one boundary crossing instead of
+             // one var()/set_shape()/set_dtype()/... call chain per
+             // variable. The variables are forced persistable, which is
+             // what the save/load program builders need.
+             for (auto &binary_str : var_protos) {
+               std::string str(binary_str);
+               proto::VarDesc var_proto;
+               PADDLE_ENFORCE(var_proto.ParseFromString(str),
+                              "Fail to parse VarDesc from string.");
+               VarDesc *var = self.Var(var_proto.name());
+               *var->Proto() = var_proto;
+               var->SetPersistable(true);
+             }
+           })
       .def("all_vars", &BlockDesc::AllVars, py::return_value_policy::reference)
+      .def("op_signatures",
+           [](BlockDesc &self) {
+             // Snapshot of (type, inputs, outputs) for every op, built in
+             // one native loop, so that Python code scanning a large block
+             // does not cross the pybind boundary once per field per op.
+             std::vector<
+                 std::tuple<std::string, VariableNameMap, VariableNameMap>>
+                 signatures;
+             signatures.reserve(self.OpSize());
+             for (auto *op : self.AllOps()) {
+               signatures.emplace_back(op->Type(), op->Inputs(),
+                                       op->Outputs());
+             }
+             return signatures;
+           })
       .def("op_size", &BlockDesc::OpSize)
       .def("op", &BlockDesc::Op, py::return_value_policy::reference)
       .def("serialize_to_string", SerializeMessage<BlockDesc>);
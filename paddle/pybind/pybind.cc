@@ -301,6 +301,11 @@ All parameter, weight, gradient are variables in Paddle.
     InferenceOptimize(*(origin.Proto()), &pruned_desc);
     return new ProgramDesc(pruned_desc);
   });
+  m.def("optimize_for_inference", [](ProgramDesc &origin) {
+    proto::ProgramDesc optimized_desc;
+    OptimizeForInference(*(origin.Proto()), &optimized_desc);
+    return new ProgramDesc(optimized_desc);
+  });
   m.def("empty_var_name", []() { return framework::kEmptyVarName; });
   m.def("grad_var_suffix", []() { return framework::kGradVarSuffix; });
   m.def_submodule(
@@ -37,6 +37,12 @@ TEMP_VAR_NAME = core.kTempVarName()
 GRAD_VAR_SUFFIX = core.kGradVarSuffix()
 ZERO_VAR_SUFFIX = core.kZeroVarSuffix()
 
+# Bits of `Variable._tag`, precomputed at construction so that predicates
+# scanning every variable of a large program test a single integer instead
+# of doing an isinstance check or desc lookups per variable.
+PARAMETER_TAG_BIT = 1
+PERSISTABLE_TAG_BIT = 2
+
 
 def grad_var_name(var_name):
     """
@@ -233,8 +239,20 @@ class Variable(object):
                             self.name, self.persistable, persistable))
 
         self.block.vars[name] = self
+        # A new variable invalidates the program's cached variable index.
+        self.block.program._var_index_cache = None
         self.op = None
         self.stop_gradient = stop_gradient
+        self._tag = 0
+        self._sync_persistable_tag_()
+
+    def _sync_persistable_tag_(self):
+        if self.desc.persistable() and \
+                self.desc.type() != core.VarDesc.VarType.FEED_MINIBATCH and \
+                self.desc.type() != core.VarDesc.VarType.FETCH_LIST:
+            self._tag |= PERSISTABLE_TAG_BIT
+        else:
+            self._tag &= ~PERSISTABLE_TAG_BIT
 
     def __str__(self):
         return self.to_string(True)
@@ -266,6 +284,8 @@ class Variable(object):
     @persistable.setter
     def persistable(self, p):
         self.desc.set_persistable(p)
+        self._sync_persistable_tag_()
+        self.block.program._var_index_cache = None
 
     @property
     def name(self):
@@ -676,6 +696,22 @@ class Block(object):
             kwargs['initializer'](var, self)
         return var
 
+    def clone_vars_bulk(self, vars):
+        """
+        Copy the descriptors of `vars` into this block through a single C++
+        call and return the corresponding new Variables, in the same order.
+        The new variables are forced persistable, as needed by the save/load
+        programs that use them.
+        """
+        vars = list(vars)
+        self.desc.create_vars_bulk(
+            [each_var.desc.serialize_to_string() for each_var in vars])
+        return [
+            self.create_var(
+                name=each_var.name, type=each_var.type, persistable=True)
+            for each_var in vars
+        ]
+
     def has_var(self, name):
         return name in self.vars
 
@@ -786,12 +822,46 @@ class Block(object):
             self.vars[new_p.name] = new_p
 
 
+class _VarIndex(object):
+    """
+    A lazily built index over all variables of a Program.
+
+    It maps variable names to variables and pre-computes the name sets of
+    parameters and persistable variables, so that callers which repeatedly
+    filter program variables (e.g. save/load) need not re-walk every block
+    of a large program on each call. Obtain it via `Program._var_index`; it
+    is rebuilt after `Program.sync_with_cpp`, after a variable is created
+    through any Python construction path, and after a variable's
+    persistable flag is assigned.
+    """
+
+    def __init__(self, program):
+        self.var_by_name = dict()
+        parameter_names = set()
+        persistable_names = set()
+        for each_var in program.list_vars():
+            self.var_by_name[each_var.name] = each_var
+            if each_var._tag & PARAMETER_TAG_BIT:
+                parameter_names.add(each_var.name)
+            if each_var._tag & PERSISTABLE_TAG_BIT:
+                persistable_names.add(each_var.name)
+        self.parameter_names = frozenset(parameter_names)
+        self.persistable_names = frozenset(persistable_names)
+
+    def parameters(self):
+        return (self.var_by_name[name] for name in self.parameter_names)
+
+    def persistables(self):
+        return (self.var_by_name[name] for name in self.persistable_names)
+
+
 class Program(object):
     def __init__(self):
         self.desc = core.ProgramDesc()
         self.blocks = [Block(self, 0)]
         self.current_block_idx = 0
         self._seed = 0
+        self._var_index_cache = None
 
     def __str__(self):
         return self.to_string(True)
@@ -838,6 +908,15 @@ class Program(object):
         res.sync_with_cpp()
         return res
 
+    def optimize_for_inference(self):
+        # A deeper rewrite than inference_optimize: besides setting is_test,
+        # debug ops such as print are removed and their readers rewired.
+        res = Program()
+        res.desc = core.optimize_for_inference(self.desc)
+        res.blocks = [Block(res, i) for i in xrange(res.desc.num_blocks())]
+        res.sync_with_cpp()
+        return res
+
     @staticmethod
     def parse_from_string(binary_str):
         p = Program()
@@ -903,6 +982,13 @@ class Program(object):
             self.blocks.append(Block(self, block_idx))
         for block in self.blocks:
             block.sync_with_cpp()
+        self._var_index_cache = None
+
+    @property
+    def _var_index(self):
+        if self._var_index_cache is None:
+            self._var_index_cache = _VarIndex(self)
+        return self._var_index_cache
 
     def copy_param_info_from(self, other):
         """
@@ -942,6 +1028,7 @@ class Parameter(Variable):
 
         Variable.__init__(
             self, block, persistable=True, shape=shape, dtype=dtype, **kwargs)
+        self._tag |= PARAMETER_TAG_BIT
         self.trainable = kwargs.get('trainable', True)
 
         self.optimize_attr = kwargs.get('optimize_attr', {'learning_rate': 1.0})